@@ -1,20 +1,53 @@
-import json
+import atexit
+import sqlite3
+import re
 import datetime
+from zoneinfo import ZoneInfo
+try:
+    import fcntl  # Unix：以 flock 取得排程鎖
+except ImportError:  # Windows 沒有 fcntl (例如本機以 python app.py 執行)，改用 msvcrt.locking
+    fcntl = None
+    import msvcrt
 import hmac
 import hashlib
 import base64
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urlparse, quote
 import os
 import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from flask import Flask, request, abort
-from apscheduler.schedulers.background import BackgroundScheduler
+from flask.json.provider import DefaultJSONProvider
+import orjson  # 導入 orjson，用於快速 JSON 解析與序列化
+import httpx  # 導入 httpx，作為 OpenAI 用戶端的連線池
 import openai
+import ciso8601  # 導入 ciso8601，以 C 實作快速解析 Trello 回傳的 ISO 8601 日期
 from dateutil import parser  # 導入 dateutil parser，用於自然語言日期解析
+from dateutil.relativedelta import relativedelta, MO, TU, WE, TH, FR, SA, SU  # 導入 relativedelta，用於計算相對日期
 from dotenv import load_dotenv # 導入 load_dotenv，用於從 .env 檔案載入環境變數
 
 load_dotenv() # 載入 .env 檔案中的環境變數 (如果有的話)
 
+# orjson JSON Provider：以 orjson 取代標準函式庫 json，加速 Flask 所有的 JSON 解析 (request.json) 與序列化 (jsonify)
+class OrjsonProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)  # 套用 orjson JSON Provider
+
+# Webhook request body 大小上限：Line 與 Trello 的 Webhook 都遠小於此，超過時直接回傳 413，避免對大型 body 計算簽名浪費 CPU
+MAX_BODY_SIZE = 256 * 1024
+app.config['MAX_CONTENT_LENGTH'] = MAX_BODY_SIZE  # 由 Flask 依 Content-Length 提前拒絕過大的請求，不需讀取整個 body
 
 # 日誌設定：設定日誌記錄，方便追蹤程式執行狀況和錯誤
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s') # 加入時間戳記和層級資訊
@@ -44,68 +77,247 @@ TRELLO_TOKEN = os.getenv('TRELLO_TOKEN')
 TRELLO_BOARD_ID = os.getenv('TRELLO_BOARD_ID')
 TRELLO_LIST_ID = os.getenv('TRELLO_LIST_ID')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+TRELLO_API_SECRET = os.getenv('TRELLO_API_SECRET')  # Trello API 金鑰頁面上的 Secret，用於驗證 Trello Webhook 簽名 (未設定時拒絕所有 Webhook 事件)
+TRELLO_WEBHOOK_CALLBACK_URL = os.getenv('TRELLO_WEBHOOK_CALLBACK_URL')  # 建立 Trello Webhook 時使用的 callbackURL (未設定時使用請求的 URL)
+
+# OpenAI 請求逾時秒數：限制 OpenAI 回應緩慢時佔用事件處理執行緒的時間
+OPENAI_TIMEOUT = 8.0
+
+# OpenAI 用戶端：共用一個 httpx 連線池，重複使用 TCP/TLS 連線，避免每次呼叫都重新建立連線；失敗時最多重試一次
+OPENAI_HTTP_CLIENT = httpx.Client(limits=httpx.Limits(max_connections=20, max_keepalive_connections=10), timeout=OPENAI_TIMEOUT)
+OPENAI_CLIENT = openai.OpenAI(api_key=OPENAI_API_KEY, http_client=OPENAI_HTTP_CLIENT, timeout=OPENAI_TIMEOUT, max_retries=1)
+
+# 外部 API 連線池：Trello 與 Line 各自共用一個 Session，以 HTTP keep-alive 重複使用 TCP/TLS 連線 (連線數上限需涵蓋事件與外部 API 兩個執行緒池的執行緒數)
+REQUEST_TIMEOUT = (3.0, 5.0)  # 外部 API 請求逾時秒數 (連線, 讀取)，避免請求卡住處理執行緒
+HTTP_RETRY = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])  # 連線錯誤或暫時性錯誤時自動重試 (預設不重試 POST 的錯誤狀態碼)
+
+# 斷路器 HTTPAdapter：對同一個外部服務連續失敗達上限時暫停呼叫，逾時後只放行一個試探請求，避免服務故障時每個請求都等到逾時、拖住所有執行緒
+class CircuitBreakerAdapter(HTTPAdapter):
+    def __init__(self, *args, fail_max=5, reset_timeout=30, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fail_max = fail_max  # 連續失敗幾次後開啟斷路器
+        self.reset_timeout = reset_timeout  # 斷路器開啟後多少秒放行試探請求
+        self.failures = 0  # 目前連續失敗次數
+        self.opened_at = None  # 斷路器開啟 (或放行試探請求) 的時間，None 表示關閉
+        self.lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        with self.lock:
+            if self.opened_at is not None:
+                if time.time() - self.opened_at < self.reset_timeout:  # 斷路器開啟中，直接失敗
+                    raise requests.exceptions.ConnectionError(f"斷路器開啟中，暫停呼叫 {urlparse(request.url).netloc}", request=request)
+                self.opened_at = time.time()  # 放行這一個試探請求，其他請求在試探結果出來前仍直接失敗
+        try:
+            response = super().send(request, **kwargs)
+        except requests.exceptions.RequestException:
+            self.record_failure()
+            raise
+        if response.status_code >= 500:  # 伺服器錯誤視為失敗，4xx 為請求本身的問題，不影響斷路器
+            self.record_failure()
+        else:
+            self.record_success()
+        return response
+
+    # 記錄失敗：連續失敗達上限時開啟斷路器
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.fail_max:
+                if self.opened_at is None:
+                    logger.warning(f"外部服務連續失敗 {self.failures} 次，斷路器開啟 {self.reset_timeout} 秒。")
+                self.opened_at = time.time()
+
+    # 記錄成功：關閉斷路器並重設失敗次數
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
 
-# 設定 OpenAI API Key：將 OpenAI API 金鑰設定到 openai 模組中
-openai.api_key = OPENAI_API_KEY
+# 外部 API 請求的 User-Agent：讓 Trello 與 Line 端能辨識請求來源
+USER_AGENT = "line-trello/1.0"
 
-# 綁定檔案名稱：設定儲存 Line 用戶 ID 和 Trello 會員 ID 綁定關係的檔案名稱
+TRELLO_SESSION = requests.Session()
+TRELLO_SESSION.mount('https://', CircuitBreakerAdapter(pool_connections=10, pool_maxsize=50, max_retries=HTTP_RETRY))
+TRELLO_SESSION.params = {'key': TRELLO_API_KEY, 'token': TRELLO_TOKEN}  # Trello API 認證參數，每個請求自動附加
+TRELLO_SESSION.headers.update({"User-Agent": USER_AGENT})
+
+LINE_SESSION = requests.Session()
+LINE_SESSION.mount('https://', CircuitBreakerAdapter(pool_connections=10, pool_maxsize=50, max_retries=HTTP_RETRY))
+LINE_SESSION.headers.update({  # Line Bot API 的 HTTP Header，每個請求自動附加
+    "User-Agent": USER_AGENT,
+    "Content-Type": "application/json",
+    "Authorization": f"Bearer {LINE_CHANNEL_ACCESS_TOKEN}"  # 使用 LINE_CHANNEL_ACCESS_TOKEN 環境變數設定 Authorization
+})
+
+# 解析 API 回應：以 orjson 直接解析原始 bytes，格式錯誤時拋出 requests 的例外，沿用各呼叫端的 RequestException 處理
+def load_json_response(response):
+    try:
+        return orjson.loads(response.content)
+    except orjson.JSONDecodeError as e:
+        raise requests.exceptions.InvalidJSONError(e, response=response)
+
+# 外部 API endpoint：啟動時組好一次，呼叫時直接使用
+TRELLO_CARDS_URL = "https://api.trello.com/1/cards"  # Trello API 卡片 endpoint (建立卡片、取得單張卡片)
+TRELLO_BOARD_URL = f"https://api.trello.com/1/boards/{TRELLO_BOARD_ID}"  # Trello API 看板 endpoint
+TRELLO_MEMBER_CARDS_URL = "https://api.trello.com/1/members/{}/cards"  # Trello API 取得會員卡片 endpoint (需填入會員 ID)
+TRELLO_LISTS_URL = f"https://api.trello.com/1/boards/{TRELLO_BOARD_ID}/lists"  # Trello API 取得看板列表 endpoint
+TRELLO_MEMBERS_URL = f"https://api.trello.com/1/boards/{TRELLO_BOARD_ID}/members"  # Trello API 取得看板成員 endpoint
+TRELLO_SEARCH_URL = "https://api.trello.com/1/search"  # Trello API 搜尋 endpoint
+LINE_PUSH_URL = "https://api.line.me/v2/bot/message/push"  # Line Bot API push message endpoint
+LINE_REPLY_URL = "https://api.line.me/v2/bot/message/reply"  # Line Bot API reply message endpoint
+LINE_MULTICAST_URL = "https://api.line.me/v2/bot/message/multicast"  # Line Bot API multicast message endpoint
+
+# 綁定資料庫名稱：以 SQLite 儲存 Line 用戶 ID 和 Trello 會員 ID 的綁定關係與已發送的截止提醒 (WAL 模式，多個行程可同時讀寫)
+BINDING_DB = "line_trello_map.db"
+
+# 舊版綁定檔案名稱：資料庫為空時會從此 JSON 檔案匯入一次既有的綁定關係
 BINDING_FILE = "line_trello_map.json"
 
-# 載入綁定關係：從 JSON 檔案載入 Line 用戶 ID 和 Trello 會員 ID 的綁定關係
-def load_bindings():
+# 綁定資料庫連線：所有執行緒共用一個連線，以 BINDINGS_DB_LOCK 保護 (PRAGMA data_version 需在同一個連線上比較)
+BINDINGS_DB = sqlite3.connect(BINDING_DB, check_same_thread=False, timeout=10)
+BINDINGS_DB.execute("PRAGMA journal_mode=WAL")  # 讀寫不互相阻擋，適合多個行程共用
+BINDINGS_DB.execute("PRAGMA synchronous=NORMAL")  # WAL 模式下仍可確保資料一致，寫入不需每次 fsync
+BINDINGS_DB.execute("CREATE TABLE IF NOT EXISTS bindings (user_id TEXT PRIMARY KEY, trello_id TEXT NOT NULL)")
+BINDINGS_DB.execute("CREATE TABLE IF NOT EXISTS reminders (card_id TEXT NOT NULL, due TEXT NOT NULL, PRIMARY KEY (card_id, due))")  # 已發送的截止提醒，重啟或多個行程時也不會重複提醒
+BINDINGS_DB.commit()
+BINDINGS_DB_LOCK = threading.Lock()
+atexit.register(BINDINGS_DB.close)
+
+# 載入舊版綁定檔案：從 JSON 檔案載入 Line 用戶 ID 和 Trello 會員 ID 的綁定關係
+def load_json_bindings():
     try:
         if os.path.exists(BINDING_FILE):
-            with open(BINDING_FILE, 'r', encoding='utf-8') as f:
-                bindings = json.load(f)
+            with open(BINDING_FILE, 'rb') as f:
+                bindings = orjson.loads(f.read())  # 以 orjson 解析 (C 實作，較標準 json 快)
                 logger.info(f"成功載入綁定檔案 {BINDING_FILE}，目前綁定數量：{len(bindings)}") # 記錄成功載入訊息，包含綁定數量
                 return bindings
-        logger.info(f"綁定檔案 {BINDING_FILE} 不存在，將返回空綁定。") # 使用 logger.info 記錄檔案不存在訊息
         return {}
-    except FileNotFoundError:
-        logger.warning(f"綁定檔案 {BINDING_FILE} 未找到，將返回空綁定。") # 使用 logger.warning 記錄檔案未找到訊息
-        return {}
-    except json.JSONDecodeError:
-        logger.error(f"綁定檔案 {BINDING_FILE} JSON 格式錯誤，將返回空綁定。請檢查檔案內容！") # 使用 logger.error 並提示檢查檔案內容
+    except orjson.JSONDecodeError:
+        logger.error(f"綁定檔案 {BINDING_FILE} JSON 格式錯誤，將不匯入。請檢查檔案內容！") # 使用 logger.error 並提示檢查檔案內容
         return {}
     except Exception as e:
-        logger.error(f"讀取綁定檔案 {BINDING_FILE} 失敗: {e}，將返回空綁定。") # 使用 logger.error 記錄讀取失敗訊息，包含例外資訊
+        logger.error(f"讀取綁定檔案 {BINDING_FILE} 失敗: {e}，將不匯入。") # 使用 logger.error 記錄讀取失敗訊息，包含例外資訊
         return {}
 
-# 儲存綁定關係：將 Line 用戶 ID 和 Trello 會員 ID 的綁定關係儲存到 JSON 檔案
-def save_bindings(bindings):
+# 匯入舊版綁定檔案：資料庫沒有任何綁定時，將 JSON 檔案中的綁定關係寫入資料庫 (只會發生一次)
+def import_json_bindings():
+    with BINDINGS_DB_LOCK:
+        if BINDINGS_DB.execute("SELECT 1 FROM bindings LIMIT 1").fetchone():  # 資料庫已有資料
+            return
+        bindings = load_json_bindings()
+        if bindings:
+            with BINDINGS_DB:  # 交易：全部成功才寫入
+                BINDINGS_DB.executemany("INSERT OR IGNORE INTO bindings (user_id, trello_id) VALUES (?, ?)", bindings.items())
+            logger.info(f"已從 {BINDING_FILE} 匯入 {len(bindings)} 筆綁定關係至 {BINDING_DB}")
+
+# 載入綁定關係：從資料庫載入所有 Line 用戶 ID 和 Trello 會員 ID 的綁定關係
+def load_bindings():
     try:
-        with open(BINDING_FILE, 'w', encoding='utf-8') as f:
-            json.dump(bindings, f, ensure_ascii=False, indent=2)
-        logger.info(f"成功儲存綁定檔案 {BINDING_FILE}，目前綁定數量：{len(bindings)}") # 記錄成功儲存訊息，包含綁定數量
-    except Exception as e:
-        logger.error(f"儲存綁定檔案 {BINDING_FILE} 失敗: {e}") # 使用 logger.error 記錄儲存失敗訊息，包含例外資訊
+        with BINDINGS_DB_LOCK:
+            bindings = dict(BINDINGS_DB.execute("SELECT user_id, trello_id FROM bindings"))
+        logger.info(f"成功載入綁定資料庫 {BINDING_DB}，目前綁定數量：{len(bindings)}") # 記錄成功載入訊息，包含綁定數量
+        return bindings
+    except sqlite3.Error as e:
+        logger.error(f"讀取綁定資料庫 {BINDING_DB} 失敗: {e}，將返回空綁定。") # 使用 logger.error 記錄讀取失敗訊息，包含例外資訊
+        return {}
+
+# 儲存單一綁定關係：只寫入變更的那一筆 (O(1))，不需重寫所有綁定，返回是否成功
+def save_binding(user_id, trello_id):
+    try:
+        with BINDINGS_DB_LOCK, BINDINGS_DB:  # 交易：成功時自動 commit
+            BINDINGS_DB.execute(
+                "INSERT INTO bindings (user_id, trello_id) VALUES (?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET trello_id = excluded.trello_id",
+                (user_id, trello_id))
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"儲存綁定關係至 {BINDING_DB} 失敗: {e}") # 使用 logger.error 記錄儲存失敗訊息，包含例外資訊
+        return False
+
+# 取得資料庫版本：其他連線 (其他行程) 寫入資料庫後數值會改變，自己的寫入不會
+def get_bindings_version():
+    with BINDINGS_DB_LOCK:
+        return BINDINGS_DB.execute("PRAGMA data_version").fetchone()[0]
+
+# 綁定關係快取：啟動時載入一次，之後直接使用記憶體中的字典，只有其他行程寫入資料庫時才重新載入
+import_json_bindings()
+BINDINGS_VERSION = get_bindings_version()  # 目前快取對應的資料庫版本
+BINDINGS = load_bindings()
+# 建立反向對應表：Trello 會員 ID -> Line 用戶 ID 列表 (同一 Trello 帳號可被多個 Line 用戶綁定)
+def build_trello_to_line(bindings):
+    trello_to_line = defaultdict(list)
+    for uid, tid in bindings.items():
+        trello_to_line[tid].append(uid)
+    return trello_to_line
+
+TRELLO_TO_LINE = build_trello_to_line(BINDINGS)  # 反向對應表，與 BINDINGS 同步維護
+BINDINGS_LOCK = threading.Lock()  # 保護綁定字典的修改，避免多執行緒同時修改
+
+# 取得綁定關係：資料庫版本未變時直接返回記憶體中的字典
+def get_bindings():
+    global BINDINGS_VERSION
+    version = get_bindings_version()
+    if version != BINDINGS_VERSION:  # 資料庫已被其他行程更新
+        BINDINGS_VERSION = version  # 先記錄版本，載入期間若資料庫再次變更，下次呼叫會再重新載入
+        reloaded = load_bindings()
+        with BINDINGS_LOCK:
+            BINDINGS.clear()
+            BINDINGS.update(reloaded)  # 就地更新，讓持有同一個字典的程式碼也能看到新內容
+            TRELLO_TO_LINE.clear()
+            TRELLO_TO_LINE.update(build_trello_to_line(reloaded))  # 反向對應表一併重建
+    return BINDINGS
 
-# 驗證 Line Signature：驗證 Line Webhook 請求的簽名，確保請求來自 Line 官方
+# 簽名驗證用的 HMAC 原型：啟動時以 Line Channel Secret 建立一次 (只讀不更新)，驗證時複製使用，不需每次重新處理金鑰
+LINE_SIGNATURE_HMAC = hmac.new(LINE_CHANNEL_SECRET.encode('utf-8'), b'', hashlib.sha256)
+
+# 驗證 Line Signature：驗證 Line Webhook 請求的簽名，確保請求來自 Line 官方 (body 為原始 bytes，不需再編碼)
 def validate_signature(body, signature):
-    hash_value = hmac.new(LINE_CHANNEL_SECRET.encode('utf-8'), body.encode('utf-8'), hashlib.sha256).digest()
-    expected_signature = base64.b64encode(hash_value).decode('utf-8')
-    if expected_signature != signature:
+    mac = LINE_SIGNATURE_HMAC.copy()
+    mac.update(body)
+    hash_value = mac.digest()
+    provided_signature = base64.b64decode(signature or '', validate=True)  # 解碼 Header 中的簽名 (格式錯誤時拋出 binascii.Error，屬於 ValueError)
+    if not hmac.compare_digest(hash_value, provided_signature):  # 直接比較原始 digest，使用固定時間比較，避免時序攻擊
         logger.warning("Line signature 驗證失敗，請求可能不是來自 Line Server！") # 使用 logger.warning 記錄簽名驗證失敗
         raise ValueError('Invalid signature.')
 
+# 綁定指令前綴
+BIND_PREFIX = "綁定 trello@"
+
 # 處理綁定 Trello 帳號指令
 def handle_binding_command(user_id, text, bindings):
-    if text.startswith("綁定 trello@"):  # 處理 "綁定 trello@" 指令
-        trello_id_input = text.replace("綁定 trello@", "").strip()  # 移除指令前綴並去除空白
+    stripped = text.removeprefix(BIND_PREFIX)  # 切掉開頭的指令前綴 (不符合時返回原字串物件本身)
+    if stripped is not text:  # 處理 "綁定 trello@" 指令
+        trello_id_input = stripped.strip()  # 去除空白
         if not trello_id_input:  # 檢查 Trello ID 是否為空
             send_line_message(user_id, "Trello 帳號 ID 不得為空，請重新輸入正確格式：『綁定 trello@你的Trello會員ID』")
             return True # 已處理指令，返回 True
         trello_id = trello_id_input  # 取得 Trello ID
-        bindings[user_id] = trello_id  # 將 Line 用戶 ID 和 Trello 會員 ID 進行綁定
-        save_bindings(bindings)  # 儲存綁定關係
+        if not save_binding(user_id, trello_id):  # 將 Line 用戶 ID 和 Trello 會員 ID 的綁定寫入資料庫
+            send_line_message(user_id, "綁定失敗，請稍後再試。")
+            return True # 已處理指令，返回 True
+        with BINDINGS_LOCK:
+            old_trello_id = bindings.get(user_id)
+            bindings[user_id] = trello_id  # 同步更新記憶體中的綁定關係
+            if old_trello_id is not None and user_id in TRELLO_TO_LINE.get(old_trello_id, ()):
+                TRELLO_TO_LINE[old_trello_id].remove(user_id)  # 移除舊綁定的反向對應
+                if not TRELLO_TO_LINE[old_trello_id]:
+                    del TRELLO_TO_LINE[old_trello_id]
+            TRELLO_TO_LINE[trello_id].append(user_id)  # 同步更新反向對應表
         send_line_message(user_id, f"綁定成功！您的 Trello 帳號 ID：{trello_id}")  # 回覆綁定成功訊息
         logger.info(f"用戶 {user_id} 成功綁定 Trello 帳號 ID: {trello_id}") # 記錄綁定成功訊息
         return True # 已處理指令，返回 True
     return False # 非綁定指令，返回 False
 
-# 處理查詢任務狀態指令 (修改後，接收 text 參數)
-def handle_status_query(user_id, trello_id, text):
-    if "狀態" in text or "進度" in text:
+# 狀態查詢關鍵字：訊息包含任一關鍵字即視為查詢任務狀態
+STATUS_KEYWORDS = frozenset({"狀態", "進度"})
+
+# 處理查詢任務狀態指令
+def handle_status_query(user_id, text, bindings):
+    if any(keyword in text for keyword in STATUS_KEYWORDS):
+        trello_id = bindings.get(user_id)  # 取得用戶綁定的 Trello 會員 ID
+        if trello_id is None:  # 尚未綁定，不查詢 Trello
+            send_line_message(user_id, "您尚未綁定 Trello 帳號，請先輸入『綁定 trello@你的Trello會員ID』進行綁定。")
+            return True
         try:
             task_status = get_user_trello_tasks(trello_id)
             reply_message = get_chatgpt_response(f"我的任務狀態是：{task_status}")
@@ -117,85 +329,139 @@ def handle_status_query(user_id, trello_id, text):
         return True
     return False
 
+# YYYY-MM-DD (或 YYYY/M/D) 日期正規表示式：文件建議的日期格式，直接以整數建立 datetime，不需任何格式解析
+ISO_DATE_RE = re.compile(r'(\d{4})[-/](\d{1,2})[-/](\d{1,2})$')
+
+# MM-DD (或 M/D) 日期正規表示式：省略年份時使用今年
+MD_DATE_RE = re.compile(r'(\d{1,2})[-/](\d{1,2})$')
+
+# 其他常見日期格式：依序以 strptime 嘗試，命中即返回，避免每次都走 dateutil 的模糊解析
+KNOWN_DATE_FORMATS = (
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%dT%H:%M:%S',
+)
+
+# 快速日期解析：結果依今天日期快取 (省略年份或模糊解析的結果會隨日期改變)，用戶常重複輸入相同的日期字串
+def fast_parse(date_str):
+    return cached_parse(date_str.strip(), datetime.date.today())
+
+# 日期解析：先比對 YYYY-MM-DD、MM-DD 與已知格式，全部失敗才退回 dateutil parser 的模糊解析
+@lru_cache(maxsize=128)
+def cached_parse(date_str, today):
+    m = ISO_DATE_RE.match(date_str)
+    if m:  # YYYY-MM-DD 格式，直接以整數建立 datetime
+        return datetime.datetime(*map(int, m.groups()))
+    m = MD_DATE_RE.match(date_str)
+    if m:  # MM-DD 格式，使用今年
+        return datetime.datetime(today.year, *map(int, m.groups()))
+    for fmt in KNOWN_DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(date_str, fmt)  # 命中已知格式，直接返回
+        except ValueError:
+            continue  # 格式不符，嘗試下一個格式
+    return parser.parse(date_str, fuzzy=True)  # 使用 fuzzy=True 允許模糊日期解析
+
+# 相對日期對照表：中文相對日期詞彙對應從今天 0 點起算的 relativedelta，常見說法不需經過 dateutil 的模糊解析
+RELATIVE_DATE_MAPPING = {
+    "下星期一": relativedelta(days=+7, weekday=MO(-1)),  # 下週的星期一
+    "週日": relativedelta(weekday=SU),  # 今天或之後最近的星期日
+    "星期日": relativedelta(weekday=SU),
+    "週一": relativedelta(weekday=MO),
+    "星期一": relativedelta(weekday=MO),
+    "週二": relativedelta(weekday=TU),
+    "星期二": relativedelta(weekday=TU),
+    "週三": relativedelta(weekday=WE),
+    "星期三": relativedelta(weekday=WE),
+    "週四": relativedelta(weekday=TH),
+    "星期四": relativedelta(weekday=TH),
+    "週五": relativedelta(weekday=FR),
+    "星期五": relativedelta(weekday=FR),
+    "週六": relativedelta(weekday=SA),
+    "星期六": relativedelta(weekday=SA),
+    "明天": relativedelta(days=+1),
+}
+
+# 預先編譯的相對日期正規表示式：較長的詞彙優先比對，避免 "星期一" 搶先吃掉 "下星期一"
+RELATIVE_DATE_RE = re.compile("|".join(re.escape(k) for k in sorted(RELATIVE_DATE_MAPPING, key=len, reverse=True)))
+
+# 時間詞彙對應的預設小時：早上 8 點、中午 12 點、下午 2 點、晚上 8 點 (可調整)
+TIME_WORDS = {"早上": 8, "中午": 12, "下午": 14, "晚上": 20}
+
+# 預先編譯的時間詞彙正規表示式：一次掃描取得時間詞彙，再查表取得對應的小時
+TIME_WORD_RE = re.compile("|".join(re.escape(k) for k in TIME_WORDS))
+
+# 截止日期的多餘詞彙：時間詞彙與 "前"/"之前"，交給日期解析前先移除
+DUE_DATE_NOISE_RE = re.compile("|".join(re.escape(k) for k in sorted([*TIME_WORDS, "前", "之前"], key=len, reverse=True)))
+
+# 解析截止日期：先查相對日期對照表，沒有相對日期詞彙時移除多餘詞彙後交給 fast_parse
+def parse_due_date(due_date_str):
+    m = RELATIVE_DATE_RE.search(due_date_str)
+    if m:  # 相對日期，直接從今天 0 點計算
+        today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+        return today + RELATIVE_DATE_MAPPING[m.group(0)]
+    return fast_parse(DUE_DATE_NOISE_RE.sub("", due_date_str))
+
+# 任務欄位正規表示式：以一次線性掃描找出所有以逗號分隔的 "關鍵字：內容" 欄位 (欄位須位於訊息開頭或逗號之後)
+TASK_FIELD_RE = re.compile(r'(?:^|，)(?P<key>新增任務|成員|開始日期|截止日期|日期)：(?P<value>[^，]*)')
+
+# 建立任務指令關鍵字：訊息不含此關鍵字時不可能有任務名稱
+TASK_KEYWORD = "新增任務："
+
+# 任務欄位對應表：將訊息中的中文關鍵字對應到變數名稱
+TASK_FIELD_MAP = {
+    '新增任務': 'task_name',
+    '成員': 'member_name',
+    '開始日期': 'start_date_str',
+    '截止日期': 'due_date_str',
+    '日期': 'due_date_str',
+}
+
+# 建立任務的回覆範本：結構化指令的回覆內容是固定的，直接套用範本，不需呼叫 ChatGPT
+TEMPLATE_REPLIES = {
+    'task_created': "已建立任務：{name}",
+    'task_created_due': "已建立任務：{name}，截止 {due}",
+    'task_failed': "建立 Trello 卡片 '{name}' 失敗，請稍後再試。",
+}
+
+# 是否在建立任務後額外附上 ChatGPT 回覆 (預設關閉；開啟時與建立 Trello 卡片同時進行)
+USE_LLM_CONFIRMATIONS = os.getenv('USE_LLM_CONFIRMATIONS', '0') == '1'
+
 # 處理建立 Trello 卡片指令
 def handle_create_task_command(user_id, text, bindings):
-    task_name = ""
-    member_name = None
-    start_date_str = None
-    due_date_str = None
     start_datetime = None
     due_datetime = None
 
-    # 嘗試從訊息中解析任務資訊 (使用逗號分隔)
-    lines = text.split('，')
-    for line in lines:
-        if line.startswith("新增任務："):
-            task_name = line[len("新增任務："):].strip()  # 提取任務名稱並去除前後空白
-        elif line.startswith("成員："):
-            member_name = line[len("成員："):].strip()  # 提取成員名稱並去除前後空白
-        elif line.startswith("開始日期："):
-            start_date_str = line[len("開始日期："):].strip()  # 提取開始日期字串並去除前後空白
-        elif line.startswith("截止日期：") or line.startswith("日期："):  # 同時處理 "截止日期" 和 "日期" 兩種關鍵字
-            due_date_str = line[len("截止日期："):].strip() if line.startswith("截止日期：") else line[len("日期："):].strip()  # 提取截止日期字串並去除前後空白
+    # 嘗試從訊息中解析任務資訊 (預先編譯的正規表示式一次掃描整段訊息，不需先以逗號分割)
+    fields = {}
+    if TASK_KEYWORD in text:  # 一般聊天訊息不含建立任務關鍵字，不需執行正規表示式
+        for m in TASK_FIELD_RE.finditer(text):
+            fields[TASK_FIELD_MAP[m.group('key')]] = m.group('value').strip()  # 提取欄位值並去除前後空白
+    task_name = fields.get('task_name', "")  # 任務名稱
+    member_name = fields.get('member_name')  # 成員名稱
+    start_date_str = fields.get('start_date_str')  # 開始日期字串
+    due_date_str = fields.get('due_date_str')  # 截止日期字串 (同時處理 "截止日期" 和 "日期" 兩種關鍵字)
 
     if not task_name:  # 如果訊息中沒有 "新增任務：" 關鍵字，則視為一般訊息，直接使用訊息文字作為任務名稱
         task_name = text  # 使用原始訊息文字作為卡片名稱
-        send_line_message(user_id, "提醒：請在訊息中包含 '新增任務：' 來建立任務，例如：新增任務：[任務名稱]，成員：[成員名稱]，日期：[週六前]")  # 發送提醒訊息，告知使用者正確的訊息格式
+        send_line_message(user_id, "提醒：請在訊息中包含 '新增任務：' 來建立任務，例如：新增任務：[任務名稱]，成員：[成員名稱]，日期：[週六前]")  # 發送提醒訊息，告知使用者正確的訊息格式 (與 ChatGPT 回覆一起送出)
         reply_message = get_chatgpt_response(text)  # 仍然使用 ChatGPT 回覆訊息 (但與日期無關)
         logger.info(f"用戶 {user_id} 發送一般訊息，將作為卡片名稱處理: {task_name}") # 記錄一般訊息處理
     else:  # 如果訊息中有 "新增任務：" 關鍵字，則建立 Trello 卡片
-        reply_message = get_chatgpt_response(text)  # 使用 ChatGPT 針對任務相關訊息產生回覆
         logger.info(f"用戶 {user_id} 嘗試建立 Trello 卡片，任務名稱: {task_name}, 成員: {member_name}, 開始日期: {start_date_str}, 截止日期: {due_date_str}")  # 記錄建立卡片嘗試訊息
 
         # NLP 日期解析：使用 dateutil.parser 解析自然語言日期描述
         try:
             if start_date_str:  # 如果有開始日期字串
-                start_datetime = parser.parse(start_date_str, fuzzy=True)  # 使用 fuzzy=True 允許模糊日期解析
+                start_datetime = fast_parse(start_date_str)  # 先嘗試已知格式，失敗才使用模糊日期解析
                 start_date_str = start_datetime.strftime('%Y-%m-%d')  # 將解析後的 datetime 物件格式化為YYYY-MM-DD 字串
                 logger.info(f"用戶 {user_id} NLP 解析開始日期成功: {start_date_str}")  # 記錄 NLP 解析成功訊息
             if due_date_str:  # 如果有截止日期字串
-                # **字串預處理：移除 "前" 和 "之前"**
-                due_date_str_processed = due_date_str.replace("前", "").replace("之前", "")
-
-                # **星期幾轉換：將中文星期幾轉換成英文**
-                weekday_mapping = {
-                    "下星期一": "next monday",
-                    "週日": "sunday",
-                    "星期日": "sunday",  # 增加星期日
-                    "週一": "monday",
-                    "星期一": "monday",  # 增加星期一
-                    "週二": "tuesday",
-                    "星期二": "tuesday",  # 增加星期二
-                    "週三": "wednesday",
-                    "星期三": "wednesday",  # 增加星期三
-                    "週四": "thursday",
-                    "星期四": "thursday",  # 增加星期四
-                    "週五": "friday",
-                    "星期五": "friday",  # 增加星期五
-                    "週六": "saturday",
-                    "星期六": "saturday",  # 增加星期六
-                    "明天": "tomorrow",
-                }
-                for chinese_weekday, english_weekday in weekday_mapping.items():
-                    due_date_str_processed = due_date_str_processed.replace(chinese_weekday, english_weekday)
-
-                # **時間詞彙初步處理：嘗試提取時間**
-                hour = 0  # 預設小時為 0
+                # **時間詞彙初步處理：嘗試提取時間 (需在替換前判斷，以設定小時)**
+                time_match = TIME_WORD_RE.search(due_date_str)  # 取第一個出現的時間詞彙
+                hour = TIME_WORDS[time_match.group(0)] if time_match else 0  # 預設小時為 0
                 minute = 0 # 預設分鐘為 0
-                if "早上" in due_date_str_processed:
-                    hour = 8  # 早上預設 8 點 (可調整)
-                    due_date_str_processed = due_date_str_processed.replace("早上", "")
-                elif "中午" in due_date_str_processed:
-                    hour = 12 # 中午預設 12 點
-                    due_date_str_processed = due_date_str_processed.replace("中午", "")
-                elif "下午" in due_date_str_processed:
-                    hour = 14 # 下午預設 2 點 (可調整)
-                    due_date_str_processed = due_date_str_processed.replace("下午", "")
-                elif "晚上" in due_date_str_processed:
-                    hour = 20 # 晚上預設 8 點 (可調整)
-                    due_date_str_processed = due_date_str_processed.replace("晚上", "")
-
-                due_datetime = parser.parse(due_date_str_processed, fuzzy=True)  # 使用 fuzzy=True 允許模糊日期解析 (對處理後的字串)
+
+                due_datetime = parse_due_date(due_date_str)  # 先查相對日期對照表，再嘗試已知格式，最後才使用模糊日期解析
 
                 if hour != 0: # 如果有提取到時間詞彙，則手動設定時間
                     due_datetime = due_datetime.replace(hour=hour, minute=minute, second=0, microsecond=0)
@@ -207,17 +473,70 @@ def handle_create_task_command(user_id, text, bindings):
             logger.warning(f"用戶 {user_id} NLP 日期解析失敗: {e}")  # 記錄 NLP 解析失敗訊息
             send_line_message(user_id, f"提醒：日期解析失敗，請嘗試更明確的日期描述，例如：YYYY-MM-DD 或 '下星期一'。")  # 回覆日期解析失敗提醒訊息
 
-        create_trello_card(task_name, member_name, start_date_str, due_date_str, due_datetime)  # 呼叫函式建立 Trello 卡片，並傳遞解析出的任務資訊 (包含日期時間物件)
+        chat_future = IO_EXECUTOR.submit(get_chatgpt_response, text) if USE_LLM_CONFIRMATIONS else None  # 與建立卡片同時呼叫 ChatGPT
+        if create_trello_card(task_name, member_name, start_date_str, due_date_str, due_datetime):  # 呼叫函式建立 Trello 卡片，並傳遞解析出的任務資訊 (包含日期時間物件)
+            reply_message = TEMPLATE_REPLIES['task_created_due' if due_datetime else 'task_created'].format(name=task_name, due=due_date_str)
+            if chat_future:  # 附上 ChatGPT 回覆 (與確認訊息一起送出)
+                send_line_message(user_id, reply_message)
+                reply_message = chat_future.result()
+        else:
+            reply_message = TEMPLATE_REPLIES['task_failed'].format(name=task_name)  # 回覆建立失敗訊息
 
     send_line_message(user_id, reply_message)  # 發送 Line 回覆訊息
     return True # 已處理指令，返回 True
 
 
+# 事件處理執行緒池：在背景處理 Line 事件 (ChatGPT、Trello、Line API 皆為網路 I/O)
+EVENT_EXECUTOR = ThreadPoolExecutor(max_workers=16)
+
+# 外部 API 呼叫執行緒池：讓互不相依的 API 呼叫同時進行 (與事件處理執行緒池分開，避免事件執行緒等待自己所在的執行緒池而卡住)
+IO_EXECUTOR = ThreadPoolExecutor(max_workers=16)
+
+# 處理單一 Line 事件：依序嘗試各指令處理函式 (於背景執行緒中執行)
+def process_event(event, bindings):
+    try:
+        if event['type'] == 'message' and event['message']['type'] == 'text':  # 判斷事件類型是否為文字訊息
+            text = event['message']['text']  # 取得訊息文字
+            user_id = event['source']['userId']  # 取得用戶 ID
+            logger.info(f"接收到來自用戶 {user_id} 的訊息: {text}") # 記錄接收到的訊息內容
+
+            REPLY_CONTEXT.user_id = user_id  # 開始暫存發給該用戶的訊息
+            REPLY_CONTEXT.outbox = []
+            try:
+                handle_text_message(user_id, text, bindings)
+            finally:
+                outbox = REPLY_CONTEXT.outbox
+                REPLY_CONTEXT.outbox = None  # 停止暫存，之後的訊息直接 push
+                flush_line_replies(user_id, event.get('replyToken'), outbox)  # 一次送出所有回覆
+    except Exception as e:  # 背景執行緒的例外不會傳回 Flask，需自行記錄
+        logger.exception(f"處理 Line 事件失敗: {e}")
+
+# 指令處理函式：依序嘗試，第一個返回 True 的函式處理該訊息 (新增指令時加入此處即可)
+COMMAND_HANDLERS = (
+    handle_binding_command,  # 處理綁定指令
+    handle_status_query,  # 處理狀態查詢指令
+    handle_create_task_command,  # 處理建立任務指令
+)
+
+# 處理文字訊息：依序嘗試各指令處理函式
+def handle_text_message(user_id, text, bindings):
+    for handler in COMMAND_HANDLERS:
+        if handler(user_id, text, bindings):
+            return # 指令已處理
+
+    # 如果以上指令都不是，則視為一般訊息，使用 ChatGPT 回覆
+    reply_message = get_chatgpt_response(text)
+    send_line_message(user_id, reply_message)
+    logger.info(f"用戶 {user_id} 輸入一般訊息，使用 ChatGPT 回覆。") # 記錄一般訊息處理
+
 # Line Webhook Callback 路由：接收 Line Server 發送的訊息事件
 @app.route("/callback", methods=['POST'])
 def callback():
     signature = request.headers.get('X-Line-Signature')  # 從 Header 中取得 signature
-    body = request.get_data(as_text=True)  # 取得 request body (訊息內容)
+    body = request.get_data(cache=True)  # 取得 request body 原始 bytes (訊息內容)，直接用於簽名驗證與 JSON 解析
+    if len(body) > MAX_BODY_SIZE:  # 計算簽名前先檢查大小
+        logger.warning(f"Line Webhook request body 過大 ({len(body)} bytes)，拒絕請求")
+        abort(413)
 
     try:
         validate_signature(body, signature)  # 驗證簽名
@@ -225,59 +544,111 @@ def callback():
         logger.warning("Line signature 驗證失敗，拒絕請求") # 使用 logger.warning 記錄簽名驗證失敗並拒絕請求
         abort(400)  # 驗證失敗回傳 400 錯誤
 
-    events = request.json.get('events', [])  # 解析 JSON body 中的 events 陣列，取得所有事件
+    events = orjson.loads(body).get('events', [])  # 以 orjson 直接解析已讀取的原始 bytes，避免解碼成字串與 Flask 再次解析 request body
     if not events: # 檢查 events 是否為空
         logger.warning("接收到空的 events 陣列，可能為測試請求或異常狀況。") # 記錄收到空 events 警告
         return 'OK' # 直接返回 200 OK，避免後續處理錯誤
 
-    bindings = load_bindings()  # 載入綁定關係
+    for event in events:  # 將每一個事件交給背景執行緒處理，立即回應 Line Server，避免逾時重送
+        EVENT_EXECUTOR.submit(process_event, event, get_bindings())
 
-    for event in events:  # 迭代處理每一個事件
-        if event['type'] == 'message' and event['message']['type'] == 'text':  # 判斷事件類型是否為文字訊息
-            text = event['message']['text']  # 取得訊息文字
-            user_id = event['source']['userId']  # 取得用戶 ID
-            logger.info(f"接收到來自用戶 {user_id} 的訊息: {text}") # 記錄接收到的訊息內容
+    return 'OK'  # 回應 Line Server HTTP 狀態碼 200，表示已成功接收訊息
+
+# Trello Webhook 簽名驗證需要 API Secret，未設定時記錄警告 (所有 Webhook 事件都會被拒絕)
+if not TRELLO_API_SECRET:
+    logger.warning("環境變數 TRELLO_API_SECRET 未設定，將拒絕所有 Trello Webhook 事件。")
 
-            if handle_binding_command(user_id, text, bindings): # 處理綁定指令
-                continue # 指令已處理，繼續下一個事件
-            if handle_status_query(user_id, bindings.get(user_id), text): # 處理狀態查詢指令  <-- 修正錯誤的地方，加入 text 參數
-                continue # 指令已處理，繼續下一個事件
-            if handle_create_task_command(user_id, text, bindings): # 處理建立任務指令
-                continue # 指令已處理，繼續下一個事件
+# 驗證 Trello Webhook 簽名函式：X-Trello-Webhook Header 為以 API Secret 對 request body 加上 callbackURL 計算的 HMAC-SHA1 (base64)，驗證失敗時拋出 ValueError
+def validate_trello_signature(body, signature, callback_url):
+    if not TRELLO_API_SECRET:
+        raise ValueError('TRELLO_API_SECRET is not set.')
+    hash_value = hmac.new(TRELLO_API_SECRET.encode('utf-8'), body + callback_url.encode('utf-8'), hashlib.sha1).digest()
+    provided_signature = base64.b64decode(signature or '', validate=True)  # 解碼 Header 中的簽名 (格式錯誤時拋出 binascii.Error，屬於 ValueError)
+    if not hmac.compare_digest(hash_value, provided_signature):  # 使用固定時間比較，避免時序攻擊
+        raise ValueError('Invalid signature.')
 
-            # 如果以上指令都不是，則視為一般訊息，使用 ChatGPT 回覆
-            reply_message = get_chatgpt_response(text)
-            send_line_message(user_id, reply_message)
-            logger.info(f"用戶 {user_id} 輸入一般訊息，使用 ChatGPT 回覆。") # 記錄一般訊息處理
+# Trello 卡片 ID 格式：24 碼小寫十六進位，Webhook 中格式不符的卡片 ID 一律拒絕
+CARD_ID_RE = re.compile(r'[0-9a-f]{24}')
 
-    return 'OK'  # 回應 Line Server HTTP 狀態碼 200，表示已成功接收訊息
+# 檢查卡片 ID 格式
+def is_valid_card_id(card_id):
+    return isinstance(card_id, str) and CARD_ID_RE.fullmatch(card_id) is not None
+
+# 卡片建立/更新的 Trello Webhook 事件類型：收到時依截止日期排定提醒
+CARD_ACTION_TYPES = {'createCard', 'updateCard'}
+
+# 需要檢查卡片 ID 的 Trello Webhook 事件類型：卡片建立、更新與刪除
+CARD_ID_ACTION_TYPES = CARD_ACTION_TYPES | {'deleteCard'}
+
+# 列表變更的 Trello Webhook 事件類型：收到時需清除列表快取 (列表刪除在 Trello 中為封存，屬於 updateList)
+LIST_ACTION_TYPES = {'createList', 'updateList', 'moveListToBoard', 'moveListFromBoard'}
 
-# Trello Webhook 路由：接收 Trello 看板的 Webhook 事件 (目前僅記錄，您可根據需求擴充功能)
-@app.route('/trello-webhook', methods=['POST'])
+# 成員異動的 Trello Webhook 事件類型：收到時需清除成員快取
+MEMBER_ACTION_TYPES = {'addMemberToBoard', 'removeMemberFromBoard'}
+
+# Trello Webhook 路由：接收 Trello 看板的 Webhook 事件 (卡片截止日期變更時排定提醒、列表或成員變更時清除快取)
+@app.route('/trello-webhook', methods=['POST', 'HEAD'])
 def trello_webhook():
-    data = request.json  # 解析 JSON request body
+    if request.method == 'HEAD':  # Trello 建立 Webhook 前會以 HEAD 請求確認 callbackURL 可用，需回應 200
+        return 'OK'
+    body = request.get_data()  # 取得 request body 原始 bytes，用於簽名驗證與 JSON 解析
+    try:
+        validate_trello_signature(body, request.headers.get('X-Trello-Webhook'), TRELLO_WEBHOOK_CALLBACK_URL or request.url)  # 驗證簽名
+    except ValueError as e:
+        logger.warning(f"Trello Webhook 簽名驗證失敗，拒絕請求：{e}")
+        abort(401)
+    try:
+        data = orjson.loads(body or b'{}')  # 以 orjson 直接解析原始 request body
+    except orjson.JSONDecodeError:
+        logger.warning("Trello Webhook request body 不是有效的 JSON，拒絕請求")
+        abort(400)
+    if not isinstance(data, dict):  # JSON 內容必須是物件
+        logger.warning("Trello Webhook request body 不是 JSON 物件，拒絕請求")
+        abort(400)
     logger.info(f"收到 Trello Webhook 請求：{data}")  # 記錄 Webhook 請求內容
 
     # 在這裡您可以根據 Trello Webhook 事件類型 (action_type) 進行不同的處理
     # 例如：卡片更新、列表變更、成員異動等
-    action_type = data.get('action', {}).get('type')  # 取得 action type
-    if action_type == 'updateCard':  # 如果是卡片更新事件
-        card_id = data.get('action', {}).get('data', {}).get('card', {}).get('id')  # 取得卡片 ID
-        card_name = data.get('action', {}).get('data', {}).get('card', {}).get('name')  # 取得卡片名稱
-        logger.info(f"Trello 卡片更新：{card_name} (ID: {card_id})")  # 記錄卡片更新事件
+    action = data.get('action', {})  # 取得 action
+    action_data = action.get('data', {}) if isinstance(action, dict) else None
+    card = action_data.get('card', {}) if isinstance(action_data, dict) else None  # 取得卡片資料
+    if not isinstance(card, dict):  # action、action.data 與 card 都必須是物件
+        logger.warning("Trello Webhook 的 action 格式錯誤，拒絕請求")
+        abort(400)
+    action_type = action.get('type')  # 取得 action type
+    if action_type in CARD_ID_ACTION_TYPES and not is_valid_card_id(card.get('id')):  # 卡片事件的卡片 ID 格式錯誤
+        logger.warning("Trello Webhook 的卡片 ID 格式錯誤，拒絕請求")
+        abort(400)
+    if action_type in CARD_ACTION_TYPES:  # 如果是卡片建立或更新事件
+        card_id = card.get('id')  # 取得卡片 ID
+        card_name = card.get('name')  # 取得卡片名稱
+        logger.info(f"Trello 卡片{'建立' if action_type == 'createCard' else '更新'}：{card_name} (ID: {card_id})")  # 記錄卡片事件
+        invalidate_member_cards_cache()  # 清除會員卡片快取
+        if card.get('closed'):  # 卡片封存，取消尚未發送的提醒
+            cancel_card_reminder(card_id)
+        elif 'due' in card:  # 事件包含截止日期 (設定、變更或移除) 時重新排定提醒
+            schedule_card_reminder(card_id, card['due'])
+    elif action_type == 'deleteCard':  # 卡片刪除事件，取消尚未發送的提醒
+        card_id = card.get('id')  # 取得卡片 ID
+        invalidate_member_cards_cache()  # 清除會員卡片快取
+        cancel_card_reminder(card_id)
+        logger.info(f"Trello 卡片刪除 (ID: {card_id})，已取消截止提醒。")  # 記錄卡片刪除事件
+    elif action_type in LIST_ACTION_TYPES:  # 如果是列表變更事件，清除列表快取
+        invalidate_list_map_cache()
+        logger.info(f"Trello 列表變更 ({action_type})，已清除列表快取。")  # 記錄列表變更事件
+    elif action_type in MEMBER_ACTION_TYPES:  # 如果是看板成員異動事件，清除成員快取
+        invalidate_members_cache()
+        logger.info(f"Trello 看板成員變更 ({action_type})，已清除成員快取。")  # 記錄成員變更事件
 
     return 'OK'  # 回應 Trello Server HTTP 狀態碼 200，表示已成功接收 Webhook
 
-# 建立 Trello 卡片函式：呼叫 Trello API 建立卡片，並設定卡片屬性 (名稱、成員、截止日期和提醒)
+# 建立卡片的固定 Trello API 請求參數：使用 TRELLO_LIST_ID 環境變數設定預設列表 (認證參數由 Session 附加)
+TRELLO_CARD_BASE_QUERY = {'idList': TRELLO_LIST_ID}
+
+# 建立 Trello 卡片函式：呼叫 Trello API 建立卡片，並設定卡片屬性 (名稱、成員、截止日期和提醒)，返回是否建立成功
 def create_trello_card(card_name, member_name=None, start_date_str=None, due_date_str=None, due_datetime=None):  # 接收更多參數，包含成員名稱、日期字串和日期時間物件
     try:
-        url = "https://api.trello.com/1/cards"  # Trello API 建立卡片 endpoint
-        query = {  # Trello API 請求參數
-            'key': TRELLO_API_KEY,
-            'token': TRELLO_TOKEN,
-            'idList': TRELLO_LIST_ID,  # 使用 TRELLO_LIST_ID 環境變數設定預設列表
-            'name': card_name,  # 卡片名稱
-        }
+        query = {**TRELLO_CARD_BASE_QUERY, 'name': card_name}  # Trello API 請求參數：固定參數加上卡片名稱
         logger.info(f"開始建立 Trello 卡片：{card_name}") # 記錄開始建立卡片訊息
 
         # 處理成員分配：如果訊息中包含成員名稱，則嘗試將卡片分配給該成員
@@ -299,166 +670,538 @@ def create_trello_card(card_name, member_name=None, start_date_str=None, due_dat
             except ValueError as e:  # 捕捉日期轉換錯誤 (雖然理論上 NLP 解析已處理，但為了程式碼的完整性，保留 try...except)
                 logger.error(f"設定截止日期失敗 (datetime 轉換錯誤): {e}")  # 記錄設定截止日期失敗訊息
 
-        response = requests.post(url, params=query)  # 發送 POST 請求到 Trello API 建立卡片
+        response = TRELLO_SESSION.post(TRELLO_CARDS_URL, params=query, timeout=REQUEST_TIMEOUT)  # 發送 POST 請求到 Trello API 建立卡片
         response.raise_for_status()  # 檢查 HTTP 狀態碼，如果失敗 (4xx 或 5xx) 則拋出例外
         logger.info(f"已成功創建 Trello 卡片：{card_name}, 回應狀態碼: {response.status_code}")  # 記錄卡片建立成功訊息，包含 HTTP 狀態碼
+        invalidate_member_cards_cache()  # 清除會員卡片快取，讓下次查詢狀態能看到新卡片
+        return True  # 建立成功
     except requests.exceptions.RequestException as e:  # 捕捉 requests 模組的例外，例如連線錯誤、HTTP 錯誤等
         logger.error(f"創建 Trello 卡片失敗：{e}")  # 記錄卡片建立失敗訊息
-        send_line_message(bindings.get(user_id), f"建立 Trello 卡片 '{card_name}' 失敗，請稍後再試。") # 回覆 Line 錯誤訊息
+        return False  # 建立失敗，由呼叫端回覆 Line 錯誤訊息
 
-# 取得 Trello 列表名稱對應 ID 的 Map：方便後續查詢列表名稱
+# Trello 列表快取：列表 ID 對應列表名稱，列表很少變動，避免每次查詢任務狀態都多呼叫一次 Trello API
+LIST_MAP_CACHE_TTL = 300  # 快取有效秒數 (5 分鐘)
+LIST_MAP_CACHE = {'t': 0, 'map': {}}  # t：上次更新時間，map：列表 ID 對應列表名稱
+
+# 清除列表快取：收到列表變更的 Trello Webhook 時呼叫，下次查詢會重新取得列表
+def invalidate_list_map_cache():
+    LIST_MAP_CACHE['t'] = 0
+
+# 取得列表的 Trello API 請求參數：只取回列表名稱 (id 一律回傳)，不需要的欄位不傳輸也不解析
+LISTS_QUERY = {'fields': 'name'}
+
+# 取得 Trello 列表名稱對應 ID 的 Map：快取未過期時直接返回，過期才重新呼叫 Trello API
 def get_list_map():
+    if time.time() - LIST_MAP_CACHE['t'] < LIST_MAP_CACHE_TTL:  # 快取仍有效
+        return LIST_MAP_CACHE['map']
     try:
-        url = f"https://api.trello.com/1/boards/{TRELLO_BOARD_ID}/lists"  # Trello API 取得看板列表 endpoint
-        query = {'key': TRELLO_API_KEY, 'token': TRELLO_TOKEN}  # Trello API 請求參數
-        response = requests.get(url, params=query)  # 發送 GET 請求到 Trello API 取得列表
+        response = TRELLO_SESSION.get(TRELLO_LISTS_URL, params=LISTS_QUERY, timeout=REQUEST_TIMEOUT)  # 發送 GET 請求到 Trello API 取得列表 (認證參數由 Session 附加)
         response.raise_for_status()  # 檢查 HTTP 狀態碼
-        lists = response.json()  # 解析 JSON response
+        lists = load_json_response(response)  # 解析 JSON response
         logger.info(f"成功取得 Trello 列表，共 {len(lists)} 個列表。") # 記錄成功取得列表訊息，包含列表數量
-        return {lst['id']: lst['name'] for lst in lists}  # 返回列表 ID 對應列表名稱的字典
+        LIST_MAP_CACHE['map'] = {lst['id']: lst['name'] for lst in lists}  # 更新快取：列表 ID 對應列表名稱的字典
+        LIST_MAP_CACHE['t'] = time.time()  # 更新快取時間
     except requests.exceptions.RequestException as e:  # 捕捉 requests 模組的例外
-        logger.error(f"獲取 Trello 列表失敗：{e}")  # 記錄獲取列表失敗訊息
-        return {}  # 發生錯誤時返回空字典
+        logger.error(f"獲取 Trello 列表失敗：{e}")  # 記錄獲取列表失敗訊息，沿用舊的快取內容 (尚未取得過則為空字典)
+    return LIST_MAP_CACHE['map']
 
-# 取得用戶 Trello 任務狀態：根據 Trello 會員 ID，查詢該用戶在看板上的任務狀態
+# 查詢任務狀態的 Trello API 請求參數：只取回該會員未封存的卡片與需要的欄位，大幅減少回應大小與 JSON 解析時間
+USER_CARDS_QUERY = {'filter': 'open', 'fields': 'name,due,idList,idBoard'}
+
+# 看板完整 ID：會員卡片以 idBoard (完整 24 碼 ID) 標示所屬看板，TRELLO_BOARD_ID 可能是看板短網址代碼，需查詢一次完整 ID
+BOARD_ID_CACHE = {'id': TRELLO_BOARD_ID if len(TRELLO_BOARD_ID) == 24 else None}
+
+# 取得看板完整 ID：第一次呼叫時查詢並快取，查詢失敗時返回 None
+def get_board_id():
+    if BOARD_ID_CACHE['id'] is None:
+        try:
+            response = TRELLO_SESSION.get(TRELLO_BOARD_URL, params={'fields': 'id'}, timeout=REQUEST_TIMEOUT)  # 發送 GET 請求到 Trello API 取得看板 ID
+            response.raise_for_status()  # 檢查 HTTP 狀態碼
+            BOARD_ID_CACHE['id'] = load_json_response(response)['id']
+        except requests.exceptions.RequestException as e:  # 捕捉 requests 模組的例外
+            logger.error(f"取得 Trello 看板 ID 失敗：{e}")
+    return BOARD_ID_CACHE['id']
+
+# 會員卡片快取：Trello 會員 ID 對應 (快取時間, 本看板上的卡片)，短時間內重複查詢狀態時不需再呼叫 Trello API
+MEMBER_CARDS_CACHE_TTL = 30  # 快取有效秒數
+MEMBER_CARDS_CACHE = {}
+MEMBER_CARDS_CACHE_LOCK = threading.Lock()  # 保護快取，避免多執行緒同時修改
+
+# 清除會員卡片快取：建立卡片或收到卡片變更的 Trello Webhook 時呼叫，下次查詢會重新取得卡片
+def invalidate_member_cards_cache():
+    with MEMBER_CARDS_CACHE_LOCK:
+        MEMBER_CARDS_CACHE.clear()
+
+# 取得會員在本看板上的卡片：快取未過期時直接返回，過期才呼叫 Trello API (失敗時拋出 RequestException)
+def get_member_cards(trello_member_id):
+    with MEMBER_CARDS_CACHE_LOCK:
+        cached = MEMBER_CARDS_CACHE.get(trello_member_id)
+    if cached and time.time() - cached[0] < MEMBER_CARDS_CACHE_TTL:  # 快取仍有效
+        return cached[1]
+    board_id = get_board_id()
+    if board_id is None:  # 無法取得看板 ID 時不可當成沒有任務，也不寫入快取
+        raise requests.exceptions.RequestException("無法取得 Trello 看板 ID")
+    fetched_at = time.time()  # 在請求前記錄時間，請求期間若快取被清除，舊資料也會較早過期
+    response = TRELLO_SESSION.get(TRELLO_MEMBER_CARDS_URL.format(quote(trello_member_id, safe='')), params=USER_CARDS_QUERY, timeout=REQUEST_TIMEOUT)  # 發送 GET 請求到 Trello API 取得會員卡片 (認證參數由 Session 附加)
+    response.raise_for_status()  # 檢查 HTTP 狀態碼
+    cards = [card for card in load_json_response(response) if card.get('idBoard') == board_id]  # 篩選出本看板上的卡片 (會員可能同時參與其他看板)
+    with MEMBER_CARDS_CACHE_LOCK:
+        MEMBER_CARDS_CACHE[trello_member_id] = (fetched_at, cards)  # 更新快取
+    return cards
+
+# 取得用戶 Trello 任務狀態：根據 Trello 會員 ID，查詢該用戶在看板上的任務狀態 (只取回該會員的卡片，不需下載整個看板)
 def get_user_trello_tasks(trello_member_id):
     try:
-        url = f"https://api.trello.com/1/boards/{TRELLO_BOARD_ID}/cards"  # Trello API 取得看板卡片 endpoint
-        query = {'key': TRELLO_API_KEY, 'token': TRELLO_TOKEN}  # Trello API 請求參數
-        response = requests.get(url, params=query)  # 發送 GET 請求到 Trello API 取得卡片
-        response.raise_for_status()  # 檢查 HTTP 狀態碼
-        cards = response.json()  # 解析 JSON response
-
-        list_map = get_list_map()  # 取得列表名稱對應 ID 的 Map，方便後續查詢列表名稱
-        user_cards = [card for card in cards if trello_member_id in card.get('idMembers', [])]  # 篩選出指派給特定 Trello 會員 ID 的卡片
+        list_map_future = IO_EXECUTOR.submit(get_list_map)  # 同時取得列表名稱對應 ID 的 Map (快取過期時與會員卡片請求並行)
+        user_cards = get_member_cards(trello_member_id)  # 取得該會員在本看板上的卡片
+        list_map = list_map_future.result()  # 方便後續查詢列表名稱
 
         if not user_cards:  # 如果沒有找到任何指派給該用戶的卡片
             logger.info(f"Trello 用戶 ID {trello_member_id} 沒有任何指派的任務。") # 記錄沒有任務訊息
             return "您目前沒有任何任務。"  # 回覆沒有任務訊息
 
-        status_message = "您的任務狀態如下：\n"  # 初始化任務狀態訊息
+        parts = ["您的任務狀態如下：\n"]  # 任務狀態訊息片段，最後一次串接
+        list_get = list_map.get  # 迴圈內重複使用的查詢方法
         for card in user_cards:  # 迭代處理每一張卡片
-            due = card.get('due', '無截止日期')  # 取得卡片截止日期，如果沒有則顯示 "無截止日期"
+            due = card.get('due')  # 取得卡片截止日期 (沒有截止日期時為 null)
             try:
                 if due:  # 如果有截止日期
-                    due = datetime.datetime.fromisoformat(due).strftime('%Y-%m-%d %H:%M')  # 將 ISO 8601 格式的日期字串轉換為YYYY-MM-DD HH:MM 格式
+                    due = ciso8601.parse_datetime(due).strftime('%Y-%m-%d %H:%M')  # 將 ISO 8601 格式的日期字串轉換為YYYY-MM-DD HH:MM 格式
+                else:
+                    due = '無截止日期'  # 如果沒有則顯示 "無截止日期"
             except ValueError:  # 捕捉日期格式錯誤
                 logger.warning(f"卡片 {card['name']} 的截止日期格式無效: {card.get('due')}")  # 記錄日期格式無效警告
                 due = '無效日期'  # 如果日期格式無效，則顯示 "無效日期"
 
-            status_message += f"- {card['name']}\n 狀態：{list_map.get(card['idList'], '未知')}\n 截止：{due}\n\n"  # 將卡片名稱、狀態和截止日期加入任務狀態訊息
+            parts.append(f"- {card['name']}\n 狀態：{list_get(card['idList'], '未知')}\n 截止：{due}\n\n")  # 將卡片名稱、狀態和截止日期加入任務狀態訊息
         logger.info(f"成功取得 Trello 用戶 ID {trello_member_id} 的任務狀態。") # 記錄成功取得任務狀態訊息
-        return status_message  # 返回任務狀態訊息
+        return "".join(parts)  # 返回任務狀態訊息
     except requests.exceptions.RequestException as e:  # 捕捉 requests 模組的例外
         logger.error(f"獲取 Trello 任務失敗：{e}")  # 記錄獲取任務失敗訊息
         return "無法獲取任務狀態，請稍後再試。"  # 回覆無法獲取任務狀態訊息
 
+# ChatGPT 回覆快取：相同提示詞在有效期間內直接返回快取的回覆，省去 OpenAI API 往返 (僅快取成功的回覆)
+CHATGPT_CACHE_MAXSIZE = 1024  # 最多快取筆數，超過時淘汰最久未使用的項目
+CHATGPT_CACHE_TTL = 600  # 快取有效秒數 (10 分鐘)，避免回覆過久不更新
+CHATGPT_CACHE = OrderedDict()  # 正規化後提示詞的雜湊值對應 (快取時間, 回覆)，依最近使用順序排列
+CHATGPT_CACHE_LOCK = threading.Lock()  # 保護快取，避免多執行緒同時修改
+
+# 過短訊息的處理：少於此長度的訊息直接返回固定回覆，省去一次 OpenAI API 往返
+CHATGPT_MIN_PROMPT_LENGTH = 2
+SHORT_PROMPT_REPLY = "請輸入更完整的訊息內容，我才能幫上忙喔！"
+
+# ChatGPT 回覆長度上限 (tokens)：限制最長生成時間，聊天訊息不需要長篇回覆
+CHATGPT_MAX_TOKENS = 256
+
+# 連續空白正規表示式：正規化快取鍵時將連續空白合併為一個空白
+WHITESPACE_RE = re.compile(r'\s+')
+
+# 正規化快取鍵：去除前後空白、合併連續空白並轉為小寫，只差在大小寫或空白的訊息共用同一個快取回覆
+def normalize_prompt(prompt):
+    return WHITESPACE_RE.sub(' ', prompt.strip()).lower()
+
+# 計算快取鍵：以正規化後提示詞的 16 bytes blake2b 雜湊值作為鍵，長訊息不會佔用額外的快取記憶體
+def chatgpt_cache_key(prompt):
+    return hashlib.blake2b(normalize_prompt(prompt).encode('utf-8'), digest_size=16).digest()
+
 # 取得 ChatGPT 回覆：呼叫 OpenAI ChatGPT API 取得自然語言回覆
 def get_chatgpt_response(prompt):
+    if len(prompt.strip()) < CHATGPT_MIN_PROMPT_LENGTH:  # 空白或過短的訊息不呼叫 OpenAI API，直接返回固定回覆
+        logger.info("訊息過短，略過 OpenAI API 呼叫。") # 記錄略過呼叫
+        return SHORT_PROMPT_REPLY
+    cache_key = chatgpt_cache_key(prompt)
+    with CHATGPT_CACHE_LOCK:
+        cached = CHATGPT_CACHE.get(cache_key)
+        if cached and time.time() - cached[0] < CHATGPT_CACHE_TTL:  # 快取命中且未過期
+            CHATGPT_CACHE.move_to_end(cache_key)  # 標記為最近使用
+            logger.info("ChatGPT 回覆命中快取，略過 OpenAI API 呼叫。") # 記錄快取命中
+            return cached[1]
     try:
-        response = openai.ChatCompletion.create(  # 呼叫 OpenAI ChatGPT API
+        response = OPENAI_CLIENT.chat.completions.create(  # 呼叫 OpenAI ChatGPT API
             model="gpt-4o",  # 使用的模型
             messages=[  # 訊息內容
                 {"role": "system", "content": "你是貼心的助理。"},  # 設定 ChatGPT 角色為貼心的助理
                 {"role": "user", "content": prompt}  # 使用者輸入的訊息
-            ]
+            ],
+            max_tokens=CHATGPT_MAX_TOKENS,  # 限制回覆長度，避免過長的生成時間
         )
         logger.info("成功呼叫 OpenAI API 並取得回覆。") # 記錄成功呼叫 OpenAI API
-        return response['choices'][0]['message']['content']  # 返回 ChatGPT 的回覆訊息
+        reply = response.choices[0].message.content  # ChatGPT 的回覆訊息
+        with CHATGPT_CACHE_LOCK:
+            CHATGPT_CACHE[cache_key] = (time.time(), reply)  # 寫入快取
+            CHATGPT_CACHE.move_to_end(cache_key)
+            if len(CHATGPT_CACHE) > CHATGPT_CACHE_MAXSIZE:  # 超過上限時淘汰最久未使用的項目
+                CHATGPT_CACHE.popitem(last=False)
+        return reply  # 返回 ChatGPT 的回覆訊息
     except Exception as e:  # 捕捉 OpenAI API 請求錯誤
         logger.error(f"OpenAI 請求失敗：{e}")  # 記錄 OpenAI API 請求失敗訊息
         return "無法生成回應，請稍後再試。"  # 回覆無法生成回應訊息
 
-# 發送 Line 訊息函式：封裝 Line Bot API 發送訊息功能
+# Line 單次請求的訊息數上限 (reply 與 push 皆同)
+LINE_MAX_MESSAGES = 5
+
+# Line 事件回覆緩衝：處理 Line 事件期間發給該用戶的訊息先暫存，事件處理完畢後以 reply API 一次送出 (每個執行緒各自一份)
+REPLY_CONTEXT = threading.local()
+
+# 發送 Line 訊息函式：處理 Line 事件期間發給發訊用戶的訊息先暫存待回覆，其他情況 (排程提醒等) 直接 push
 def send_line_message(user_id, message):
+    outbox = getattr(REPLY_CONTEXT, 'outbox', None)
+    if outbox is not None and REPLY_CONTEXT.user_id == user_id:  # 正在處理該用戶的事件
+        outbox.append(message)
+        return
+    push_line_messages(user_id, [message])
+
+# 以 push API 發送訊息：每次請求最多 5 則訊息
+def push_line_messages(user_id, messages):
+    for i in range(0, len(messages), LINE_MAX_MESSAGES):  # 依訊息數上限分批發送
+        batch = messages[i:i + LINE_MAX_MESSAGES]
+        try:
+            data = {  # request body 內容
+                "to": user_id,  # 接收訊息的 Line 用戶 ID
+                "messages": [{"type": "text", "text": m} for m in batch]  # 訊息內容，這裡設定為 text message
+            }
+            response = LINE_SESSION.post(LINE_PUSH_URL, json=data, timeout=REQUEST_TIMEOUT)  # 發送 POST 請求到 Line Bot API (Header 由 Session 附加)
+            response.raise_for_status()  # 檢查 HTTP 狀態碼
+            logger.info(f"已發送 LINE 訊息給用戶 {user_id}, 訊息內容：{batch[0][:20]}...")  # 記錄訊息發送成功訊息，只記錄前 20 字元避免敏感資訊外洩
+        except requests.exceptions.RequestException as e:  # 捕捉 requests 模組的例外
+            logger.error(f"發送 LINE 訊息失敗給用戶 {user_id}: {e}")  # 記錄訊息發送失敗訊息
+
+# 以 reply API 回覆訊息：不佔用 push 訊息額度，reply token 只能使用一次且最多 5 則訊息，返回是否成功
+def reply_line_messages(reply_token, messages):
     try:
-        url = "https://api.line.me/v2/bot/message/push"  # Line Bot API push message endpoint
-        headers = {  # HTTP Header 設定
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {LINE_CHANNEL_ACCESS_TOKEN}"  # 使用 LINE_CHANNEL_ACCESS_TOKEN 環境變數設定 Authorization
-        }
         data = {  # request body 內容
-            "to": user_id,  # 接收訊息的 Line 用戶 ID
-            "messages": [{"type": "text", "text": message}]  # 訊息內容，這裡設定為 text message
+            "replyToken": reply_token,  # Line 事件附帶的 reply token
+            "messages": [{"type": "text", "text": m} for m in messages]  # 訊息內容，這裡設定為 text message
         }
-        response = requests.post(url, headers=headers, json=data)  # 發送 POST 請求到 Line Bot API
+        response = LINE_SESSION.post(LINE_REPLY_URL, json=data, timeout=REQUEST_TIMEOUT)  # 發送 POST 請求到 Line Bot API (Header 由 Session 附加)
         response.raise_for_status()  # 檢查 HTTP 狀態碼
-        logger.info(f"已發送 LINE 訊息給用戶 {user_id}, 訊息內容：{message[:20]}...")  # 記錄訊息發送成功訊息，只記錄前 20 字元避免敏感資訊外洩
-    except requests.exceptions.RequestException as e:  # 捕捉 requests 模組的例外
-        logger.error(f"發送 LINE 訊息失敗給用戶 {user_id}: {e}")  # 記錄訊息發送失敗訊息
+        logger.info(f"已回覆 LINE 訊息 {len(messages)} 則, 訊息內容：{messages[0][:20]}...")  # 記錄訊息回覆成功訊息，只記錄前 20 字元避免敏感資訊外洩
+        return True
+    except requests.exceptions.RequestException as e:  # 捕捉 requests 模組的例外 (例如 reply token 已過期)
+        logger.warning(f"回覆 LINE 訊息失敗，改用 push 發送: {e}")  # 記錄回覆失敗訊息
+        return False
+
+# 送出 Line 事件的回覆：前 5 則以 reply API 送出，失敗或超過的部分改用 push
+def flush_line_replies(user_id, reply_token, messages):
+    if not messages:
+        return
+    if reply_token and reply_line_messages(reply_token, messages[:LINE_MAX_MESSAGES]):
+        messages = messages[LINE_MAX_MESSAGES:]
+    push_line_messages(user_id, messages)
+
+# Line multicast 每次請求的收件人上限
+LINE_MULTICAST_LIMIT = 500
+
+# 發送 Line 群發訊息函式：以 multicast API 將同一則訊息一次發送給多位用戶 (每次最多 500 位)，取代逐一 push；只有一位收件人時直接 push (push 的速率限制較寬鬆)
+def send_line_multicast(user_ids, message):
+    if len(user_ids) == 1:
+        push_line_messages(user_ids[0], [message])
+        return
+    for i in range(0, len(user_ids), LINE_MULTICAST_LIMIT):  # 依收件人上限分批發送
+        batch = user_ids[i:i + LINE_MULTICAST_LIMIT]
+        try:
+            data = {  # request body 內容
+                "to": batch,  # 接收訊息的 Line 用戶 ID 列表
+                "messages": [{"type": "text", "text": message}]  # 訊息內容，這裡設定為 text message
+            }
+            response = LINE_SESSION.post(LINE_MULTICAST_URL, json=data, timeout=REQUEST_TIMEOUT)  # 發送 POST 請求到 Line Bot API (Header 由 Session 附加)
+            response.raise_for_status()  # 檢查 HTTP 狀態碼
+            logger.info(f"已群發 LINE 訊息給 {len(batch)} 位用戶, 訊息內容：{message[:20]}...")  # 記錄訊息發送成功訊息，只記錄前 20 字元避免敏感資訊外洩
+        except requests.exceptions.RequestException as e:  # 捕捉 requests 模組的例外
+            logger.error(f"群發 LINE 訊息失敗給用戶 {batch}: {e}")  # 記錄訊息發送失敗訊息
+
+# 截止提醒設定：卡片截止前一天發送提醒，同一張卡片同一個截止日期只提醒一次
+REMINDER_LEAD = datetime.timedelta(days=1)  # 提醒提前時間
+REMINDER_TIMERS = {}  # 已排定的單次提醒：卡片 ID 對應 threading.Timer
+REMINDER_LOCK = threading.Lock()  # 保護排定的 Timer，避免 Webhook 與排程執行緒同時修改
 
-# 定期檢查 Trello 卡片截止日期的排程任務函式：每天檢查一次 Trello 看板上的卡片，並在卡片即將到期時發送 Line 提醒訊息
+# 認領卡片提醒：以 INSERT OR IGNORE 寫入 (卡片 ID, 截止日期)，只有第一次寫入返回 True；截止日期變更後才會再次提醒
+def claim_reminder(card_id, due):
+    try:
+        with BINDINGS_DB_LOCK, BINDINGS_DB:  # 交易：成功時自動 commit
+            return BINDINGS_DB.execute("INSERT OR IGNORE INTO reminders (card_id, due) VALUES (?, ?)", (card_id, due)).rowcount == 1
+    except sqlite3.Error as e:
+        logger.error(f"寫入提醒紀錄至 {BINDING_DB} 失敗: {e}")
+        return True  # 無法記錄時仍發送提醒，避免漏發
+
+# 是否已發送過此截止日期的提醒
+def is_reminded(card_id, due):
+    try:
+        with BINDINGS_DB_LOCK:
+            return BINDINGS_DB.execute("SELECT 1 FROM reminders WHERE card_id = ? AND due = ?", (card_id, due)).fetchone() is not None
+    except sqlite3.Error as e:
+        logger.error(f"讀取提醒紀錄失敗: {e}")
+        return False
+
+# 刪除提醒紀錄：指定卡片 ID 時刪除該卡片的紀錄，指定截止日期時刪除截止日期在此之前 (已截止) 的紀錄，避免紀錄無限增長
+def delete_reminders(card_id=None, due_before=None):
+    try:
+        with BINDINGS_DB_LOCK, BINDINGS_DB:
+            if card_id is not None:
+                BINDINGS_DB.execute("DELETE FROM reminders WHERE card_id = ?", (card_id,))
+            if due_before is not None:
+                BINDINGS_DB.execute("DELETE FROM reminders WHERE due <= ?", (due_before,))
+    except sqlite3.Error as e:
+        logger.error(f"刪除提醒紀錄失敗: {e}")
+
+# 取得單張卡片的 Trello API 請求參數：只取回截止提醒需要的欄位
+REMINDER_CARD_QUERY = {'fields': 'name,due,idMembers,closed'}
+
+# 取得 Trello 會員 ID 對應 Line 用戶 ID 的反向對應表：與綁定快取同步維護，不需每次重建，查詢皆為 O(1)
+def get_trello_to_line():
+    get_bindings()  # 資料庫被其他行程更新時會一併重建反向對應表
+    return TRELLO_TO_LINE
+
+# 將 UTC datetime 格式化為 Trello 截止日期字串格式 (例如 2024-01-02T03:04:05.000Z)：同格式的 UTC 字串可直接以字串大小比較先後
+def format_trello_due(dt):
+    return dt.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+# 解析 Trello 截止日期：將 ISO 8601 字串轉為 UTC datetime，沒有截止日期或格式錯誤時返回 None
+def parse_trello_due(due):
+    if not due:
+        return None
+    try:
+        return ciso8601.parse_datetime(due).astimezone(datetime.timezone.utc)
+    except ValueError:  # 捕捉日期格式錯誤
+        logger.error(f"Trello 卡片截止日期格式無效: {due}")
+        return None
+
+# 發送卡片截止提醒：以一次 multicast 通知卡片上所有已綁定的成員，已對相同截止日期提醒過的卡片直接略過
+def send_card_reminder(card, trello_to_line):
+    if not claim_reminder(card['id'], card['due']):  # 已提醒過 (記錄提醒，避免 Webhook、整點檢查、重啟或其他行程重複提醒)
+        return
+    recipients = [uid for m in card.get('idMembers', []) if m in trello_to_line for uid in trello_to_line[m]]  # 卡片上已綁定 Line 的成員
+    if recipients:  # 如果有已綁定的成員
+        logger.info(f"排程任務：發送提醒訊息給用戶 {recipients} 關於卡片 {card['name']}")  # 更明確的發送提醒訊息日誌
+        send_line_multicast(recipients, f"提醒：任務『{card['name']}』將在 24 小時內截止，請注意。")  # 一次發送 Line 提醒訊息給所有成員
+
+# 排定單次卡片提醒：在截止前一天觸發，提醒時間已過但尚未截止時立即觸發；超過下一次整點檢查的卡片交由整點檢查處理
+def schedule_card_reminder(card_id, due):
+    if not INPROC_CRON_ENABLED:  # 未啟用程式內排程的行程不發送提醒，避免多行程重複提醒
+        return
+    with REMINDER_LOCK:
+        timer = REMINDER_TIMERS.pop(card_id, None)  # 截止日期變更時取消先前排定的提醒
+        if timer:
+            timer.cancel()
+        due_date = parse_trello_due(due)
+        if due_date is None or is_reminded(card_id, due):  # 沒有截止日期或已提醒過
+            return
+        now = datetime.datetime.now(datetime.timezone.utc)
+        delay = (due_date - REMINDER_LEAD - now).total_seconds()  # 距離提醒時間的秒數
+        if due_date <= now or delay > CHECK_INTERVAL_SECONDS:  # 已截止，或下一次整點檢查會再排定
+            return
+        timer = threading.Timer(max(delay, 0), run_card_reminder, args=(card_id,))
+        timer.daemon = True  # 設為背景執行緒，不阻擋程式結束
+        REMINDER_TIMERS[card_id] = timer
+        timer.start()
+    logger.info(f"已排定卡片 {card_id} 的截止提醒，{max(delay, 0):.0f} 秒後發送。")
+
+# 取消卡片提醒：卡片刪除或封存時取消尚未發送的提醒
+def cancel_card_reminder(card_id):
+    with REMINDER_LOCK:
+        timer = REMINDER_TIMERS.pop(card_id, None)
+    if timer:
+        timer.cancel()
+    delete_reminders(card_id=card_id)  # 卡片恢復後可再次提醒
+
+# 執行單次卡片提醒：重新取得卡片，確認截止日期仍在提醒區間內才發送 (避免漏收 Webhook 時發送過時的提醒)
+def run_card_reminder(card_id):
+    with REMINDER_LOCK:
+        if REMINDER_TIMERS.get(card_id) is threading.current_thread():  # 只移除自己，不影響重新排定的 Timer
+            del REMINDER_TIMERS[card_id]
+    try:
+        response = TRELLO_SESSION.get(f"{TRELLO_CARDS_URL}/{quote(card_id, safe='')}", params=REMINDER_CARD_QUERY, timeout=REQUEST_TIMEOUT)  # 發送 GET 請求到 Trello API 取得單張卡片
+        response.raise_for_status()  # 檢查 HTTP 狀態碼
+        card = load_json_response(response)
+    except requests.exceptions.RequestException as e:  # 捕捉 requests 模組的例外，交由整點檢查補發
+        logger.error(f"排程任務：取得卡片 {card_id} 失敗：{e}")
+        return
+    due_date = parse_trello_due(card.get('due'))
+    if card.get('closed') or due_date is None:  # 卡片已封存或已移除截止日期
+        return
+    now = datetime.datetime.now(datetime.timezone.utc)
+    if now < due_date <= now + REMINDER_LEAD:  # 已進入提醒區間
+        send_card_reminder(card, get_trello_to_line())
+    else:  # 截止日期已變更，重新排定
+        schedule_card_reminder(card_id, card['due'])
+
+# 搜尋即將到期卡片的 Trello API 請求參數：由 Trello 端篩選即將到期的卡片 (idBoards 只接受完整看板 ID，於檢查時加入)
+DUE_SEARCH_QUERY = {
+    'query': 'due:2 is:open',  # 只搜尋兩天內到期且未封存的卡片
+    'modelTypes': 'cards',  # 只需要卡片
+    'card_fields': 'name,due,idMembers',  # 只取回需要的欄位
+    'cards_limit': 1000,  # 搜尋結果上限
+}
+
+# 檢查執行鎖：確保同一時間只有一個截止日期檢查在執行
+CHECK_LOCK = threading.Lock()
+
+# 定期檢查 Trello 卡片截止日期的排程任務函式：每小時檢查一次，作為 Webhook 提醒的備援，提醒 24 小時內截止的卡片並排定下一小時內需要提醒的卡片
 def check_trello_cards():
+    if not CHECK_LOCK.acquire(blocking=False):  # 上一次檢查尚未結束時直接略過，避免 Trello 回應緩慢時檢查重疊執行
+        logger.warning("排程任務：上一次檢查尚未完成，略過本次檢查。")
+        return
+    try:
+        run_trello_cards_check()
+    finally:
+        CHECK_LOCK.release()
+
+# 檢查 Trello 卡片截止日期：搜尋即將到期的卡片，發送或排定提醒 (由 check_trello_cards 確保同時只有一個執行)
+def run_trello_cards_check():
     logger.info("排程任務開始：檢查 Trello 卡片截止日期...")  # 更明確的排程任務開始日誌
-    bindings = load_bindings()  # 載入綁定關係
+    board_id = get_board_id()  # 限定搜尋的看板 (TRELLO_BOARD_ID 可能是短網址代碼，需使用完整 ID)
+    if board_id is None:  # 無法取得看板 ID (錯誤已記錄)，下次檢查再重試
+        logger.error("排程任務：無法取得 Trello 看板 ID，略過本次檢查。")
+        return
+    trello_to_line = get_trello_to_line()  # 建立 Trello 會員 ID 對應 Line 用戶 ID 的反向對應表
     try:
-        url = f"https://api.trello.com/1/boards/{TRELLO_BOARD_ID}/cards"  # Trello API 取得看板卡片 endpoint
-        query = {'key': TRELLO_API_KEY, 'token': TRELLO_TOKEN}  # Trello API 請求參數
-        response = requests.get(url, params=query)  # 發送 GET 請求到 Trello API 取得卡片
+        response = TRELLO_SESSION.get(TRELLO_SEARCH_URL, params={**DUE_SEARCH_QUERY, 'idBoards': board_id}, timeout=REQUEST_TIMEOUT)  # 發送 GET 請求到 Trello API 搜尋卡片
         response.raise_for_status()  # 檢查 HTTP 狀態碼
-        cards = response.json()  # 解析 JSON response
-        logger.info(f"排程任務：成功取得 Trello 卡片，共 {len(cards)} 張卡片。") # 記錄成功取得卡片訊息，包含卡片數量
-
-        now = datetime.datetime.now()  # 取得目前時間 (本地時間)
+        cards = load_json_response(response).get('cards', [])  # 解析 JSON response，取得卡片列表
+        logger.info(f"排程任務：成功取得即將到期的 Trello 卡片，共 {len(cards)} 張卡片。") # 記錄成功取得卡片訊息，包含卡片數量
 
+        now = datetime.datetime.now(datetime.timezone.utc)  # 取得目前時間 (UTC，與 Trello 回傳的截止日期時區一致)
+        now_due = format_trello_due(now)  # 以字串比較截止日期，大部分卡片不需解析成 datetime
+        lead_due = format_trello_due(now + REMINDER_LEAD)
+        futures = []  # 各卡片的提醒訊息交由外部 API 執行緒池同時發送
         for card in cards:  # 迭代處理每一張卡片
-            due_date = card.get('due')  # 取得卡片的截止日期 (ISO 8601 格式字串)
-            if not due_date:  # 如果卡片沒有設定截止日期
-                logger.info(f"排程任務：卡片 {card['name']} 沒有截止日期，跳過檢查。")  # 更明確的跳過檢查日誌
-                continue  # 跳過本次迴圈，繼續檢查下一張卡片
-
-            try:
-                due_date = datetime.datetime.fromisoformat(due_date)  # 將 ISO 8601 格式的日期字串轉換為 datetime 物件
-            except ValueError:  # 捕捉日期格式錯誤
-                logger.error(f"排程任務：卡片 {card['name']} 的截止日期格式無效: {card.get('due')}")  # 更明確的日期格式錯誤日誌
+            if trello_to_line.keys().isdisjoint(card.get('idMembers', [])):  # 卡片上沒有任何已綁定 Line 的成員，不需提醒
+                continue
+            due = card.get('due')  # Trello 回傳的截止日期為 UTC ISO 8601 字串
+            if not due or due <= now_due:  # 沒有截止日期或已截止
                 continue  # 跳過本次迴圈，繼續檢查下一張卡片
+            if due <= lead_due:  # 24 小時內截止，發送提醒 (已提醒過的卡片會略過)
+                futures.append(IO_EXECUTOR.submit(send_card_reminder, card, trello_to_line))
+            else:  # 下一次檢查前可能進入提醒區間，排定準時的單次提醒
+                schedule_card_reminder(card['id'], card['due'])
+        for future in futures:  # 等待所有提醒送出，確保檢查結束前不會重疊下一次檢查
+            future.result()
 
-            if (due_date - now).days == 1:  # 判斷卡片是否即將在一天後到期
-                logger.info(f"排程任務：卡片 {card['name']} 即將截止，剩餘時間：一天。")  # 更明確的卡片即將截止日誌
-                for trello_member_id in card.get('idMembers', []):  # 迭代處理卡片上的每一個成員
-                    user_id = next((uid for uid, tid in bindings.items() if tid == trello_member_id), None)  # 根據 Trello 會員 ID 查找綁定的 Line 用戶 ID
-                    if user_id:  # 如果找到綁定的 Line 用戶 ID
-                        logger.info(f"排程任務：發送提醒訊息給用戶 {user_id} 關於卡片 {card['name']}")  # 更明確的發送提醒訊息日誌
-                        send_line_message(user_id, f"提醒：任務『{card['name']}』明天截止，請注意。")  # 發送 Line 提醒訊息
+        delete_reminders(due_before=now_due)  # 清除已截止卡片的提醒紀錄，避免紀錄無限增長
     except requests.exceptions.RequestException as e:  # 捕捉 requests 模組的例外
         logger.error(f"排程任務：檢查 Trello 卡片截止日期失敗：{e}")  # 更明確的排程任務失敗日誌
     logger.info("排程任務結束：檢查 Trello 卡片截止日期完成。") # 更明確的排程任務結束日誌
 
-# 根據成員名稱取得 Trello 會員 ID 函式：呼叫 Trello API 根據成員名稱查找 Trello 會員 ID
-def get_trello_member_id_by_name(member_name):
-    """
-    根據成員名稱 (member_name) 查找 Trello 成員 ID
-    **請務必參考 Trello API 文件，實作呼叫 Trello API 搜尋成員的邏輯**
-    **並根據您的 Trello Board 或 Organization 的實際情況修改程式碼**
+# Trello 看板成員快取：成員全名/使用者名稱對應會員 ID，避免每次建立卡片都呼叫 Trello API 並線性搜尋
+MEMBERS_CACHE_TTL = 300  # 快取有效秒數 (5 分鐘)
+MEMBERS_CACHE = {'t': 0, 'map': {}}  # t：上次更新時間，map：成員名稱對應會員 ID
+MEMBERS_QUERY = {'filter': 'all', 'fields': 'fullName,username'}  # Trello API 請求參數，filter=all 取得所有成員，只取回需要的欄位
+MEMBERS_REFRESH_MIN_INTERVAL = 30  # 查無成員時重新取得成員的最短間隔秒數，避免打錯名稱時每則訊息都呼叫 Trello API
 
-    **以下僅為範例程式碼，可能需要大幅修改才能在您的環境中使用**
-    """
+# 清除成員快取：收到成員異動的 Trello Webhook 時呼叫，下次查詢會重新取得成員
+def invalidate_members_cache():
+    MEMBERS_CACHE['t'] = 0
+
+# 取得看板成員名稱對應 ID 的 Map：快取未過期時直接返回，過期才重新呼叫 Trello API
+def get_members_map():
+    if time.time() - MEMBERS_CACHE['t'] < MEMBERS_CACHE_TTL:  # 快取仍有效
+        return MEMBERS_CACHE['map']
     try:
-        url = f"https://api.trello.com/1/boards/{TRELLO_BOARD_ID}/members"  # Trello API 取得看板成員 endpoint
-        query = {'key': TRELLO_API_KEY, 'token': TRELLO_TOKEN, 'filter': 'all'}  # Trello API 請求參數，filter=all 取得所有成員
-        response = requests.get(url, params=query)  # 發送 GET 請求到 Trello API 取得看板成員
+        response = TRELLO_SESSION.get(TRELLO_MEMBERS_URL, params=MEMBERS_QUERY, timeout=REQUEST_TIMEOUT)  # 發送 GET 請求到 Trello API 取得看板成員
         response.raise_for_status()  # 檢查 HTTP 狀態碼
-        members = response.json()  # 解析 JSON response
+        members = load_json_response(response)  # 解析 JSON response
         logger.info(f"成功取得 Trello 看板成員，共 {len(members)} 位成員。") # 記錄成功取得看板成員訊息
 
-        for member in members:  # 迭代處理每一個成員
-            if member.get('fullName') == member_name or member.get('username') == member_name:  # 比對成員全名或使用者名稱 (擇一比對)
-                logger.info(f"找到成員：{member['fullName']} (ID: {member['id']})")  # 記錄找到成員訊息
-                return member['id']  # 找到成員，返回成員 ID
-        logger.warning(f"找不到名為 '{member_name}' 的 Trello 成員。")  # 記錄找不到成員警告訊息
-        return None  # 找不到成員，返回 None
+        members_map = {}
+        for member in members:  # 單次迭代建立對應表，成員全名與使用者名稱皆可查詢，不分大小寫 (先出現的成員優先)
+            for name in (member.get('fullName'), member.get('username')):
+                if name:
+                    members_map.setdefault(name.lower(), member['id'])
+        MEMBERS_CACHE['map'] = members_map  # 更新快取內容
+        MEMBERS_CACHE['t'] = time.time()  # 更新快取時間
     except requests.exceptions.RequestException as e:  # 捕捉 requests 模組的例外
-        logger.error(f"搜尋 Trello 成員失敗：{e}")  # 記錄搜尋成員失敗訊息
-        return None  # 發生錯誤，返回 None
+        logger.error(f"搜尋 Trello 成員失敗：{e}")  # 記錄搜尋成員失敗訊息，沿用舊的快取內容
+    return MEMBERS_CACHE['map']
+
+# 根據成員名稱取得 Trello 會員 ID 函式：從看板成員快取中查找 Trello 會員 ID
+def get_trello_member_id_by_name(member_name):
+    """
+    根據成員名稱 (member_name) 查找 Trello 成員 ID
+    成員全名 (fullName) 或使用者名稱 (username) 皆可比對 (不分大小寫)，找不到時返回 None
+    """
+    key = member_name.strip().lower()
+    member_id = get_members_map().get(key)  # O(1) 查詢成員 ID
+    if member_id is None and time.time() - MEMBERS_CACHE['t'] >= MEMBERS_REFRESH_MIN_INTERVAL:  # 查無成員時重新取得一次 (可能是新加入的成員)
+        invalidate_members_cache()
+        member_id = get_members_map().get(key)
+    if member_id:
+        logger.info(f"找到成員：{member_name} (ID: {member_id})")  # 記錄找到成員訊息
+    else:
+        logger.warning(f"找不到名為 '{member_name}' 的 Trello 成員。")  # 記錄找不到成員警告訊息
+    return member_id
+
+# 排程檢查間隔：截止提醒主要由 Trello Webhook 觸發，每小時檢查一次作為備援
+CHECK_INTERVAL_SECONDS = 60 * 60
+
+# 排程檢查時段：只在營業時間 (當地時間 8:00 至 22:59) 執行整點檢查，避免夜間無意義的輪詢；夜間到期的提醒於隔天首次檢查時補發
+CHECK_TIMEZONE = ZoneInfo(os.getenv('CHECK_TIMEZONE', 'Asia/Taipei'))
+CHECK_START_HOUR = 8
+CHECK_END_HOUR = 22
+
+# 排程鎖定檔：多個 worker 行程 (例如 gunicorn) 同時啟動時，只有取得檔案鎖的行程執行程式內排程
+CRON_LOCK_FILE = "line_trello_cron.lock"
+
+# 取得排程鎖：以非阻塞的 flock (Windows 為 msvcrt.locking) 嘗試鎖定，成功時返回需保持開啟的檔案 (行程結束時鎖會自動釋放)，失敗時返回 None
+def acquire_cron_lock():
+    lock_file = open(CRON_LOCK_FILE, 'w')
+    try:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)  # 鎖定檔案第一個 byte
+    except OSError:  # 其他行程已持有排程鎖
+        lock_file.close()
+        return None
+    return lock_file
+
+# 是否啟用程式內排程 (可設定 ENABLE_INPROC_CRON=0 完全停用，例如改由外部排程執行)；多個行程時只有取得排程鎖的行程執行
+CRON_LOCK = acquire_cron_lock() if os.getenv('ENABLE_INPROC_CRON', '1') == '1' else None
+INPROC_CRON_ENABLED = CRON_LOCK is not None
+
+CHECK_TIMER = None  # 目前排定的下一次檢查，程式結束時取消
+
+# 排定下一次檢查：以 threading.Timer 在背景執行緒延遲執行，不需要完整的排程器
+def schedule_check_trello_cards():
+    global CHECK_TIMER
+    CHECK_TIMER = threading.Timer(CHECK_INTERVAL_SECONDS, run_scheduled_check)
+    CHECK_TIMER.daemon = True  # 設為背景執行緒，不阻擋程式結束
+    CHECK_TIMER.start()
+
+# 是否在排程檢查時段內
+def in_check_hours():
+    return CHECK_START_HOUR <= datetime.datetime.now(CHECK_TIMEZONE).hour <= CHECK_END_HOUR
+
+# 排程任務執行：檢查 Trello 卡片後再排定下一次檢查 (非營業時間略過檢查，但仍排定下一次)
+def run_scheduled_check():
+    try:
+        if in_check_hours():
+            check_trello_cards()
+    except Exception as e:  # 確保任何例外都不會中斷排程迴圈
+        logger.exception(f"排程任務：檢查 Trello 卡片時發生未預期錯誤：{e}")
+    finally:
+        schedule_check_trello_cards()
+
+# 停止排程：取消下一次檢查與所有尚未發送的卡片提醒
+def shutdown_scheduler():
+    if CHECK_TIMER:
+        CHECK_TIMER.cancel()
+    with REMINDER_LOCK:
+        for timer in REMINDER_TIMERS.values():
+            timer.cancel()
+        REMINDER_TIMERS.clear()
 
-# 初始化排程器：設定排程任務，定期檢查 Trello 卡片截止日期
-scheduler = BackgroundScheduler()  # 建立背景排程器
-scheduler.add_job(check_trello_cards, 'interval', hours=24)  # 修改為每天檢查一次，更符合「定期」檢查的語意
-scheduler.start()  # 啟動排程器
-logger.info("排程任務已啟動，將每天檢查 Trello 卡片截止日期。")  # 更明確的排程任務啟動訊息
+# 初始化排程：定期檢查 Trello 卡片截止日期
+if INPROC_CRON_ENABLED:
+    schedule_check_trello_cards()
+    atexit.register(shutdown_scheduler)  # 程式結束時停止排程
+    logger.info("排程任務已啟動，將於營業時間每小時檢查 Trello 卡片截止日期。")  # 更明確的排程任務啟動訊息
+elif os.getenv('ENABLE_INPROC_CRON', '1') == '1':
+    logger.info("其他行程已執行程式內排程任務，本行程不啟動排程。")  # 記錄排程任務由其他行程執行
+else:
+    logger.info("已停用程式內排程任務 (ENABLE_INPROC_CRON=0)。")  # 記錄排程任務停用訊息
 
 # Flask 應用程式啟動入口點
 if __name__ == "__main__":
     from waitress import serve  # 導入 waitress，用於生產環境部署
     logger.info("Flask 應用程式即將啟動...") # 記錄 Flask 應用程式啟動訊息
-    serve(app, host="0.0.0.0", port=5000)  # 使用 waitress 啟動 Flask 應用程式，監聽 5000 端口，host="0.0.0.0" 允許外部連線，方便 Render 部署
\ No newline at end of file
+    serve(app, host="0.0.0.0", port=5000, threads=32, connection_limit=500, channel_timeout=30, cleanup_interval=30)  # 使用 waitress 啟動 Flask 應用程式，監聽 5000 端口，host="0.0.0.0" 允許外部連線，方便 Render 部署；請求多為等待外部 API 的 I/O，提高處理執行緒數 (預設 4)
\ No newline at end of file
@@ -0,0 +1,20 @@
+# gunicorn 設定檔：正式環境以 gthread worker 執行 Flask 應用程式 (啟動指令：gunicorn app:app)
+import os
+
+# 監聽位址：預設 5000 端口，部署平台 (例如 Render) 指定 PORT 時使用該端口
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# worker 數量：預設 1 個行程，並發由下方的執行緒與程式內的執行緒池處理 (請求多為等待外部 API 的 I/O)
+# 卡片提醒計時器與各項快取都存在單一行程的記憶體中：多個 worker 時只有持有排程鎖的行程會排定提醒，
+# 其他 worker 收到的 Trello Webhook 不會排定提醒，快取清除也只對收到 Webhook 的行程生效，因此不建議調高 WEB_CONCURRENCY
+workers = int(os.getenv('WEB_CONCURRENCY', '1'))
+
+# 使用 gthread worker：請求多為等待外部 API 的 I/O，每個行程以多執行緒處理
+worker_class = "gthread"
+threads = 16
+
+# 請求逾時秒數：Line Webhook 會立即回應，超過此時間代表 worker 卡住
+timeout = 30
+
+# 不使用 preload_app：綁定資料庫連線與背景執行緒需在各 worker 行程內建立，不能在 fork 前建立
+preload_app = False